@@ -1,71 +1,424 @@
 import json
+import atexit
 import os
 import random
+import threading
+import time
 import logging
 
-from typing import List, Dict, Literal
+from collections import Counter
+from typing import List, Dict, Literal, Optional, Set, Tuple
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
+from summarize import (
+    generate_mcq_questions,
+    load_pdf_metadata,
+    SUMMARY_FOLDER,
+    DELAY_BETWEEN_REQUESTS,
+    QUESTIONS_PER_DOCUMENT,
 )
 
+logger = logging.getLogger(__name__)
+
 # File paths
 QUESTION_BANK_EN_FILE: str = "question_bank_en.json"
 QUESTION_BANK_AR_FILE: str = "question_bank_ar.json"
+QUIZ_POOL_STATE_FILE: str = "quiz_pool_state.json"
 
 # Data type for each question
 Question = Dict[str, object]
 
+# Pool settings (per language and document)
+QUIZ_POOL_LOW_WATER_MARK: int = 5
+QUIZ_POOL_MAX_SIZE: int = 20
+QUIZ_POOL_MAX_PER_REQUEST: int = 5  # fresh questions one quiz may take
+QUIZ_POOL_REFILL_INTERVAL: int = 300  # seconds
+QUIZ_POOL_MAX_BACKOFF: int = 6 * 3600  # seconds, after repeated empty top-ups
+QUESTION_BANK_MAX_SIZE: int = 500  # per language, in memory and in the state file
+
 # Loaded question lists
 questions_en: List[Question] = []
 questions_ar: List[Question] = []
 
+# Freshly generated questions waiting to be served: language -> document -> questions
+question_pool: Dict[str, Dict[str, List[Question]]] = {"en": {}, "ar": {}}
+# Pool questions already served and added to the bank, oldest first
+served_questions: Dict[str, List[Question]] = {"en": [], "ar": []}
+seen_questions: Dict[str, Set[str]] = {"en": set(), "ar": set()}
+
+_pool_lock = threading.Lock()
+_refill_event = threading.Event()
+_refill_thread: Optional[threading.Thread] = None
+_state_dirty = False
+
+# Consecutive top-ups that added nothing, and when to try again: (document, language)
+_refill_failures: Dict[Tuple[str, str], int] = {}
+_refill_retry_at: Dict[Tuple[str, str], float] = {}
+
 
 def init() -> None:
+    """Load the question bank and the saved pool, then index them for dedup."""
+    load_question_bank()
+    load_pool_state()
+    load_seen_questions()
+
+
+def load_question_bank() -> None:
     """Load the full question bank into memory."""
     global questions_en, questions_ar
     questions_en = []
     questions_ar = []
 
     if not os.path.exists(QUESTION_BANK_EN_FILE):
-        logging.error(f"Question bank file '{QUESTION_BANK_EN_FILE}' does not exist.")
+        logger.error("Question bank file '%s' does not exist.", QUESTION_BANK_EN_FILE)
         return
 
     if not os.path.exists(QUESTION_BANK_AR_FILE):
-        logging.error(f"Question bank file '{QUESTION_BANK_AR_FILE}' does not exist.")
+        logger.error("Question bank file '%s' does not exist.", QUESTION_BANK_AR_FILE)
         return
 
     try:
         with open(QUESTION_BANK_EN_FILE, "r", encoding="utf-8") as f:
             questions_en = json.load(f)
-        logging.info(
-            f"Loaded {len(questions_en)} questions from '{QUESTION_BANK_EN_FILE}'"
+        logger.info(
+            "Loaded %d questions from '%s'", len(questions_en), QUESTION_BANK_EN_FILE
         )
 
         with open(QUESTION_BANK_AR_FILE, "r", encoding="utf-8") as f:
             questions_ar = json.load(f)
-        logging.info(
-            f"Loaded {len(questions_ar)} questions from '{QUESTION_BANK_AR_FILE}'"
+        logger.info(
+            "Loaded %d questions from '%s'", len(questions_ar), QUESTION_BANK_AR_FILE
         )
 
     except Exception as e:
-        logging.error(f"Failed to load question bank: {e}")
+        logger.error("Failed to load question bank: %s", e)
+
+
+def load_pool_state() -> None:
+    """Restore pooled and already served questions saved by a previous run."""
+    if not os.path.exists(QUIZ_POOL_STATE_FILE):
+        return
+
+    try:
+        with open(QUIZ_POOL_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception as e:
+        logger.error("Failed to load quiz pool state: %s", e)
+        return
+
+    with _pool_lock:
+        for language, bank in (("en", questions_en), ("ar", questions_ar)):
+            pools = state.get("pool", {}).get(language, {})
+            question_pool[language] = {
+                document: [q for q in pooled if is_valid_question(q)]
+                for document, pooled in pools.items()
+            }
+
+            served = state.get("served", {}).get(language, [])
+            served = [q for q in served if is_valid_question(q)]
+            served_questions[language] = served[-QUESTION_BANK_MAX_SIZE:]
+            bank.extend(served_questions[language])
+            if len(bank) > QUESTION_BANK_MAX_SIZE:
+                del bank[: len(bank) - QUESTION_BANK_MAX_SIZE]
+
+    logger.info(
+        "Restored quiz pool state: %d pooled, %d served questions.",
+        sum(len(p) for pools in question_pool.values() for p in pools.values()),
+        sum(len(served) for served in served_questions.values()),
+    )
+
+
+def save_pool_state() -> None:
+    """Persist the pool and the served questions kept in the bank."""
+    global _state_dirty
+
+    with _pool_lock:
+        state = {
+            "pool": {
+                language: {document: list(pooled) for document, pooled in pools.items()}
+                for language, pools in question_pool.items()
+            },
+            "served": {
+                language: list(served) for language, served in served_questions.items()
+            },
+        }
+        _state_dirty = False
+
+    try:
+        with open(QUIZ_POOL_STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+    except Exception as e:
+        logger.error("Failed to save quiz pool state: %s", e)
+
+
+def load_seen_questions() -> None:
+    """Rebuild duplicate detection from the bank and the pool."""
+    with _pool_lock:
+        for language, bank in (("en", questions_en), ("ar", questions_ar)):
+            seen_questions[language] = {question_key(q) for q in bank}
+            for pooled in question_pool[language].values():
+                seen_questions[language].update(question_key(q) for q in pooled)
+
+
+def question_key(question: Question) -> str:
+    """Normalize question text for duplicate detection."""
+    return " ".join(str(question.get("question", "")).split()).casefold()
+
+
+def is_valid_question(question: object) -> bool:
+    """Check that a generated question has the shape the frontend expects."""
+    if not isinstance(question, dict):
+        return False
+
+    text = question.get("question")
+    choices = question.get("choices")
+    correct = question.get("correct_choice_index")
+
+    return (
+        isinstance(text, str)
+        and bool(text.strip())
+        and isinstance(choices, list)
+        and len(choices) == 4
+        and all(isinstance(c, str) and c.strip() for c in choices)
+        and len({c.strip() for c in choices}) == 4
+        and isinstance(correct, int)
+        and not isinstance(correct, bool)
+        and 0 <= correct <= 3
+    )
+
+
+def load_document_summaries() -> Dict[str, str]:
+    """Read the summary text of every document that has one ready."""
+    summaries: Dict[str, str] = {}
+
+    for pdf_file, entry in load_pdf_metadata().items():
+        if not entry.get("summary_ready"):
+            continue
+
+        document = os.path.splitext(pdf_file)[0]
+        summary_path = os.path.join(SUMMARY_FOLDER, f"{document}.txt")
+        try:
+            with open(summary_path, "r", encoding="utf-8") as f:
+                summaries[document] = f.read()
+        except OSError as e:
+            logger.error("Failed to read summary for %s: %s", document, e)
+
+    return summaries
+
+
+def add_to_pool(
+    document: str, language: Literal["ar", "en"], candidates: List[object]
+) -> int:
+    """Validate and deduplicate candidates, then add them to the pool."""
+    added = 0
+
+    with _pool_lock:
+        pooled = question_pool[language].setdefault(document, [])
+        seen = seen_questions[language]
+
+        for candidate in candidates:
+            if len(pooled) >= QUIZ_POOL_MAX_SIZE:
+                break
+            if not is_valid_question(candidate):
+                continue
+
+            key = question_key(candidate)
+            if key in seen:
+                continue
+
+            seen.add(key)
+            pooled.append(
+                {
+                    "question": candidate["question"],
+                    "choices": candidate["choices"],
+                    "correct_choice_index": candidate["correct_choice_index"],
+                }
+            )
+            added += 1
+
+    return added
+
+
+def refill_pool() -> None:
+    """Top up every document and language that is below the low-water mark.
+
+    Questions are requested in batches of QUESTIONS_PER_DOCUMENT until the
+    pool is full. A pool whose top-ups keep adding nothing is retried with
+    exponential backoff, so failing or duplicate-only generations do not
+    repeat every cycle.
+    """
+    global _state_dirty
+
+    for document, summary_text in load_document_summaries().items():
+        for language in ("en", "ar"):
+            key = (document, language)
+            if time.monotonic() < _refill_retry_at.get(key, 0.0):
+                continue
+
+            with _pool_lock:
+                pooled = len(question_pool[language].get(document, []))
+
+            if pooled >= QUIZ_POOL_LOW_WATER_MARK:
+                continue
+
+            logger.info(
+                "Topping up %s quiz pool for %s (%d pooled).",
+                language.upper(),
+                document,
+                pooled,
+            )
+
+            total_added = 0
+            unusable_reply = False
+            while pooled < QUIZ_POOL_MAX_SIZE:
+                candidates = generate_mcq_questions(
+                    summary_text,
+                    min(QUIZ_POOL_MAX_SIZE - pooled, QUESTIONS_PER_DOCUMENT),
+                    language,
+                )
+                time.sleep(DELAY_BETWEEN_REQUESTS)
+
+                if not isinstance(candidates, list) or not candidates:
+                    logger.error(
+                        "Unusable %s question reply for %s (empty or unparseable).",
+                        language.upper(),
+                        document,
+                    )
+                    unusable_reply = True
+                    break
+
+                added = add_to_pool(document, language, candidates)
+                logger.info(
+                    "Added %d of %d generated questions to %s pool for %s.",
+                    added,
+                    len(candidates),
+                    language.upper(),
+                    document,
+                )
+                if not added:
+                    break
+
+                total_added += added
+                pooled += added
+
+            if total_added:
+                _refill_failures.pop(key, None)
+                _refill_retry_at.pop(key, None)
+                _state_dirty = True
+                continue
+
+            failures = _refill_failures.get(key, 0) + 1
+            backoff = min(
+                QUIZ_POOL_REFILL_INTERVAL * 2 ** (failures - 1),
+                QUIZ_POOL_MAX_BACKOFF,
+            )
+            _refill_failures[key] = failures
+            _refill_retry_at[key] = time.monotonic() + backoff
+            logger.warning(
+                "No new %s questions for %s after %d attempts (%s). "
+                "Retrying in %d s.",
+                language.upper(),
+                document,
+                failures,
+                "unusable reply" if unusable_reply else "duplicates or invalid",
+                backoff,
+            )
+
+
+def _refill_loop() -> None:
+    while True:
+        try:
+            refill_pool()
+            if _state_dirty:
+                save_pool_state()
+        except Exception as e:
+            logger.error("Error refilling quiz pool: %s", e)
+
+        _refill_event.wait(QUIZ_POOL_REFILL_INTERVAL)
+        _refill_event.clear()
+
+
+def start_pool_refiller() -> None:
+    """Start the background thread that keeps the question pool topped up."""
+    global _refill_thread
+
+    if _refill_thread is not None and _refill_thread.is_alive():
+        return
+
+    _refill_thread = threading.Thread(
+        target=_refill_loop, name="quiz-pool-refiller", daemon=True
+    )
+    _refill_thread.start()
+    atexit.register(save_pool_state)
+
+
+def get_question_bank(language: Literal["ar", "en"]) -> List[Question]:
+    """Return a snapshot of the full in-memory question bank for a language."""
+    with _pool_lock:
+        return list(questions_ar if language == "ar" else questions_en)
 
 
 def generate_quiz_questions(
     n: int, language: Literal["ar", "en"]
 ) -> Dict[str, List[Question]]:
-    """Pick n random questions from the loaded question bank."""
-    questions = questions_ar if language == "ar" else questions_en
+    """Pick n random questions, preferring fresh ones from the pool.
 
-    if not questions:
-        logging.error("No questions available in memory.")
-        return {"questions": []}
+    At most QUIZ_POOL_MAX_PER_REQUEST pool questions are taken per call.
+    Served pool questions move into the in-memory bank and are saved with
+    the pool by the refiller thread, which is woken when this call drops a
+    document's pool below the low-water mark. This never calls the LLM or
+    writes files itself.
+    """
+    global _state_dirty
+
+    if language != "ar":
+        language = "en"
+    questions = questions_ar if language == "ar" else questions_en
 
     try:
-        selected_questions = random.sample(questions, min(n, len(questions)))
+        with _pool_lock:
+            pools = question_pool[language]
+            fresh = [
+                (document, question)
+                for document, pooled in pools.items()
+                for question in pooled
+            ]
+            picked = random.sample(
+                fresh, max(min(n, QUIZ_POOL_MAX_PER_REQUEST, len(fresh)), 0)
+            )
+
+            served = served_questions[language]
+            for document, question in picked:
+                pools[document].remove(question)
+                questions.append(question)
+                served.append(question)
+
+            if len(questions) > QUESTION_BANK_MAX_SIZE:
+                del questions[: len(questions) - QUESTION_BANK_MAX_SIZE]
+            if len(served) > QUESTION_BANK_MAX_SIZE:
+                del served[: len(served) - QUESTION_BANK_MAX_SIZE]
+            if picked:
+                _state_dirty = True
+
+            taken = Counter(document for document, _ in picked)
+            if any(
+                len(pools[document])
+                < QUIZ_POOL_LOW_WATER_MARK
+                <= len(pools[document]) + count
+                for document, count in taken.items()
+            ):
+                _refill_event.set()
+
+        selected_questions = [question for _, question in picked]
+        remaining = [q for q in questions if q not in selected_questions]
+        selected_questions += random.sample(
+            remaining, min(n - len(selected_questions), len(remaining))
+        )
+
+        if not selected_questions:
+            logger.error("No questions available in memory.")
+
         return {"questions": selected_questions}
 
     except Exception as e:
-        logging.error(f"Error generating quiz: {e}")
+        logger.error("Error generating quiz: %s", e)
         raise
@@ -10,28 +10,42 @@ from dotenv import load_dotenv
 from validators import validate_email_general, validate_same_script_email
 from mailer import send_confirmation_email
 from chatbot import ask_ai, init as chatbot_init
-from aiquiz import generate_quiz_questions, init as aiquiz_init
-from summarize import generate_summary_and_questions
+from aiquiz import (
+    generate_quiz_questions,
+    get_question_bank,
+    init as aiquiz_init,
+    start_pool_refiller,
+)
+from summarize import (
+    generate_summary_and_questions,
+    load_pdf_metadata,
+    summary_tier_path,
+    SUMMARY_TIERS,
+)
+from logging_setup import setup_logging, init_app as logging_init_app, mask_email
+from http_layer import conditional, init_app as http_init_app, PREFLIGHT_MAX_AGE
 
 # ================================
 # Setup
 # ================================
 
 load_dotenv()
+setup_logging()
 
 # Preprocess and initialize data
 generate_summary_and_questions()
 aiquiz_init()
+start_pool_refiller()
 chatbot_init()
 
 SUPPORTED_LANG = {"ar", "en"}
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, max_age=PREFLIGHT_MAX_AGE)
+logging_init_app(app)
+http_init_app(app)
 
 SUBSCRIBERS_FILE = "subscribers.txt"
 subscribers: set[str] = set()
@@ -44,15 +58,15 @@ def load_subscribers() -> None:
                 email = line.strip()
                 if email:
                     subscribers.add(email)
-        logging.info(f"Loaded {len(subscribers)} subscribers from file.")
+        logger.info("Loaded %d subscribers from file.", len(subscribers))
     else:
-        logging.info("No subscribers file found. Starting fresh.")
+        logger.info("No subscribers file found. Starting fresh.")
 
 
 def save_subscriber(email: str) -> None:
     with open(SUBSCRIBERS_FILE, "a", encoding="utf-8") as f:
         f.write(email + "\n")
-    logging.info(f"Saved new subscriber: {email}")
+    logger.info("Saved new subscriber: %s", mask_email(email))
 
 
 load_subscribers()
@@ -62,20 +76,17 @@ load_subscribers()
 # ================================
 
 
-@app.route("/api/subscribe", methods=["POST", "OPTIONS"])
+@app.route("/api/subscribe", methods=["POST"])
 def subscribe():
-    if request.method == "OPTIONS":
-        return jsonify({}), 200
-
     data: Dict[str, Any] = request.get_json()
     email: str = data.get("email", "").strip()
 
-    logging.info(f"Received subscription request: {email}")
+    logger.info("Received subscription request: %s", mask_email(email))
 
     if not email or not (
         validate_email_general(email) and validate_same_script_email(email)
     ):
-        logging.warning("Invalid email format or mixed scripts detected.")
+        logger.warning("Invalid email format or mixed scripts detected.")
         return (
             jsonify(
                 {
@@ -87,7 +98,7 @@ def subscribe():
         )
 
     if email in subscribers:
-        logging.info(f"Email {email} already subscribed.")
+        logger.info("Email %s already subscribed.", mask_email(email))
         return jsonify({"success": False, "message": "Email already subscribed."}), 409
 
     subscribers.add(email)
@@ -95,9 +106,9 @@ def subscribe():
 
     try:
         send_confirmation_email(email)
-        logging.info(f"Confirmation email sent to {email}.")
+        logger.info("Confirmation email sent to %s.", mask_email(email))
     except Exception as e:
-        logging.error(f"Error sending confirmation email: {e}")
+        logger.error("Error sending confirmation email: %s", e)
         return (
             jsonify(
                 {"success": False, "message": "Failed to send confirmation email."}
@@ -113,11 +124,8 @@ def subscribe():
     )
 
 
-@app.route("/api/chat", methods=["POST", "OPTIONS"])
+@app.route("/api/chat", methods=["POST"])
 def chat():
-    if request.method == "OPTIONS":
-        return jsonify({}), 200
-
     data: Dict[str, Any] = request.get_json()
     messages = data.get("messages", [])
     language = data.get("language", "en").lower().strip()
@@ -144,34 +152,67 @@ def chat():
         answer = ask_ai(filtered_messages, language)
         return jsonify({"success": True, "answer": answer})
     except Exception as e:
-        logging.error(f"Error communicating with Claude: {e}")
+        logger.error("Error communicating with Claude: %s", e)
         return (
             jsonify({"success": False, "message": "Error communicating with AI."}),
             500,
         )
 
 
-@app.route("/api/quiz", methods=["GET", "OPTIONS"])
+@app.route("/api/quiz", methods=["GET"])
 def quiz():
-    if request.method == "OPTIONS":
-        return jsonify({}), 200
-
     n = request.args.get("n", default=5, type=int)
     language = request.args.get("language", default="en", type=str).lower().strip()
 
     if language not in SUPPORTED_LANG:
         return jsonify({"success": False, "message": "Invalid language provided."}), 400
 
-    logging.info(f"Received quiz request for {n} questions in '{language}'.")
+    logger.info("Received quiz request for %d questions in '%s'.", n, language)
 
     try:
         quiz_data = generate_quiz_questions(n, language)
         return jsonify({"success": True, **quiz_data})
     except Exception as e:
-        logging.error(f"Error generating quiz: {e}")
+        logger.error("Error generating quiz: %s", e)
         return jsonify({"success": False, "message": "Error generating quiz."}), 500
 
 
+@app.route("/api/questions", methods=["GET"])
+@conditional
+def questions():
+    language = request.args.get("language", default="en", type=str).lower().strip()
+
+    if language not in SUPPORTED_LANG:
+        return jsonify({"success": False, "message": "Invalid language provided."}), 400
+
+    return jsonify({"success": True, "questions": get_question_bank(language)})
+
+
+@app.route("/api/documents", methods=["GET"])
+@conditional
+def documents():
+    documents_data = []
+
+    for pdf_file, entry in sorted(load_pdf_metadata().items()):
+        document = os.path.splitext(pdf_file)[0]
+        documents_data.append(
+            {
+                "document": document,
+                "hash": entry.get("hash"),
+                "summary_ready": entry.get("summary_ready", False),
+                "questions_en_ready": entry.get("questions_en_ready", False),
+                "questions_ar_ready": entry.get("questions_ar_ready", False),
+                "summary_tiers": [
+                    tier
+                    for tier in SUMMARY_TIERS
+                    if os.path.exists(summary_tier_path(document, tier))
+                ],
+            }
+        )
+
+    return jsonify({"success": True, "documents": documents_data})
+
+
 # ================================
 # Run Server
 # ================================
@@ -1,61 +1,90 @@
 from anthropic import Anthropic
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import os
 import logging
 
+from summarize import SUMMARY_TIERS, summary_tier_path
 
 anthropic = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
-)
+logger = logging.getLogger(__name__)
 
-SUMMARY_FOLDER = "summaries"
 DEFAULT_SUMMARY_FILE = "20230926101240991_vcujterl_ad0.txt"  # fallback
 DOCUMENT_SUMMARY = None
 ACTIVE_SUMMARY_FILE = None  # Tracks the currently loaded summary
+ACTIVE_SUMMARY_TIER = None
+SUMMARY_TOKEN_BUDGET = 3000  # max estimated tokens of summary in the system prompt
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, assuming about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def select_summary_tier(tier_texts: Dict[str, str]) -> Optional[str]:
+    """Pick the most detailed tier within budget, else the smallest available."""
+    for tier in reversed(SUMMARY_TIERS):
+        text = tier_texts.get(tier)
+        if text is not None and estimate_tokens(text) <= SUMMARY_TOKEN_BUDGET:
+            return tier
+
+    return next((tier for tier in SUMMARY_TIERS if tier in tier_texts), None)
 
 
 def init(summary_filename=None):
-    """Initialize chatbot with a given summary file."""
+    """Initialize chatbot with the best-fitting tier of a given summary file."""
     global DOCUMENT_SUMMARY
     global ACTIVE_SUMMARY_FILE
+    global ACTIVE_SUMMARY_TIER
 
     if summary_filename is None:
         summary_filename = DEFAULT_SUMMARY_FILE
 
-    summary_path = (
-        os.path.join(SUMMARY_FOLDER, summary_filename)
-        if not summary_filename.startswith(SUMMARY_FOLDER)
-        else summary_filename
-    )
+    document = os.path.splitext(os.path.basename(summary_filename))[0]
 
     try:
-        with open(summary_path, "r", encoding="utf-8") as f:
-            DOCUMENT_SUMMARY = f.read()
+        tier_texts: Dict[str, str] = {}
+        for tier in SUMMARY_TIERS:
+            tier_path = summary_tier_path(document, tier)
+            if os.path.exists(tier_path):
+                with open(tier_path, "r", encoding="utf-8") as f:
+                    tier_texts[tier] = f.read()
+
+        tier = select_summary_tier(tier_texts)
+        if tier is None:
+            raise FileNotFoundError(f"No summary tiers found for {document}")
+
+        DOCUMENT_SUMMARY = tier_texts[tier]
         ACTIVE_SUMMARY_FILE = summary_filename
-        logging.info(f"Loaded summarized document for chatbot: {summary_filename}")
+        ACTIVE_SUMMARY_TIER = tier
+        logger.info(
+            "Loaded %s summarized document for chatbot: %s (~%d tokens)",
+            tier,
+            summary_filename,
+            estimate_tokens(DOCUMENT_SUMMARY),
+        )
     except Exception as e:
-        logging.error(f"Failed to load summarized document {summary_filename}: {e}")
+        logger.error("Failed to load summarized document %s: %s", summary_filename, e)
         DOCUMENT_SUMMARY = "Summary could not be loaded."
         ACTIVE_SUMMARY_FILE = None
+        ACTIVE_SUMMARY_TIER = None
 
 
 def ask_ai(messages: List[Dict[str, str]], language: str) -> str:
     """Answer based on full conversation messages using Claude."""
     try:
         if DOCUMENT_SUMMARY is None:
-            logging.error("Document summary not loaded.")
+            logger.error("Document summary not loaded.")
             return "Error: Document not available for answering."
 
         if language == "ar":
-            logging.info("CHATBOT: selected arabic language")
+            logger.debug("CHATBOT: selected arabic language")
             system_prompt = (
                 f"أنت مساعد ذكي. يجب أن تجيب دائمًا استنادًا فقط إلى المستند الملخّص التالي:\n{DOCUMENT_SUMMARY}\n"
                 f"إذا كان السؤال خارج محتوى المستند، يجب أن ترفض بأدب. أجب دائمًا بلغة العربية."
             )
         else:
-            logging.info("CHATBOT: selected english language")
+            logger.debug("CHATBOT: selected english language")
             system_prompt = (
                 f"You are an assistant that answers strictly based on the following summarized document:\n{DOCUMENT_SUMMARY}\n"
                 f"If the question is outside the content, politely refuse. Reply in English only."
@@ -77,5 +106,5 @@ def ask_ai(messages: List[Dict[str, str]], language: str) -> str:
         return response.content[0].text if response.content else ""
 
     except Exception as e:
-        logging.error(f"Error answering question: {e}")
+        logger.error("Error answering question: %s", e)
         raise
@@ -0,0 +1,67 @@
+import gzip
+import brotli
+
+from functools import wraps
+from typing import Callable
+
+from flask import Flask, Response, request, make_response
+
+# Response settings
+PREFLIGHT_MAX_AGE: int = 86400  # seconds browsers may cache CORS preflights
+CACHEABLE_MAX_AGE: int = 60  # seconds clients may reuse a cacheable read
+COMPRESS_MIN_SIZE: int = 1024  # bytes
+COMPRESS_MIMETYPES = {"application/json", "text/plain", "text/html"}
+GZIP_LEVEL: int = 6
+BROTLI_QUALITY: int = 5
+
+
+def conditional(view: Callable) -> Callable:
+    """Tag a view's successful responses with an ETag and answer repeats with 304."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+
+        if response.status_code == 200:
+            # Weak, because compression may change the bytes of the same content
+            response.add_etag(weak=True)
+            response.cache_control.public = True
+            response.cache_control.max_age = CACHEABLE_MAX_AGE
+            response.make_conditional(request)
+
+        return response
+
+    return wrapper
+
+
+def compress_response(response: Response) -> Response:
+    """Compress large text responses with brotli or gzip, as the client accepts."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = request.accept_encodings.best_match(["br", "gzip"])
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    elif encoding == "gzip":
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    else:
+        return response
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Register response compression on a Flask app."""
+    app.after_request(compress_response)
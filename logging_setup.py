@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any
+
+from flask import Flask, request, g
+
+# Logging defaults, overridable through LOG_LEVEL, LOG_QUEUE_SIZE and
+# LOG_SAMPLE_RATES (comma-separated "route=rate" pairs, e.g.
+# "/api/quiz=0.1,/api/chat=0.5")
+DEFAULT_LOG_LEVEL: str = "INFO"
+DEFAULT_LOG_QUEUE_SIZE: int = 10000
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER: str = "X-Request-ID"
+
+# Per-request context, set on the request thread and copied onto each record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+route_var: ContextVar[Optional[str]] = ContextVar("route", default=None)
+sampled_var: ContextVar[bool] = ContextVar("sampled", default=True)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+    "route",
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_sample_rates: Dict[str, float] = {}
+
+
+def mask_email(email: str) -> str:
+    """Hide the local part of an email address, keeping the domain."""
+    local_part, sep, domain = email.partition("@")
+    if not sep:
+        return "***"
+    return f"{local_part[:1]}***@{domain}"
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "route=rate" pairs into a mapping clamped to [0, 1]."""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        route, sep, rate = item.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            rates[route.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+            payload["route"] = getattr(record, "route", None)
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request context and drop low-severity records of unsampled requests."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and not sampled_var.get():
+            return False
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hand raw records to the background listener without formatting them.
+
+    Records that do not fit in a full queue are dropped and counted. Once the
+    queue has room again, a warning with the number of dropped records is
+    queued ahead of the next record.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue is in-process, so the record can be passed as-is and
+        # message formatting happens on the listener thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Runs under the handler lock, so the counters need no extra locking
+        try:
+            if self._unreported:
+                self.queue.put_nowait(_drop_notice(self._unreported))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+def _drop_notice(count: int) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "name": __name__,
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": "Dropped %d log records because the log queue was full.",
+            "args": (count,),
+        }
+    )
+
+
+def setup_logging() -> None:
+    """Route all logging through a queue drained by a background writer.
+
+    Settings are read from the environment here, so call this after
+    `load_dotenv()`. Empty or invalid values fall back to the defaults.
+    """
+    global _listener, _queue_handler, _sample_rates
+
+    if _listener is not None:
+        return
+
+    warnings: List[str] = []
+
+    log_level = (os.getenv("LOG_LEVEL") or DEFAULT_LOG_LEVEL).strip().upper()
+    if not isinstance(logging.getLevelName(log_level), int):
+        warnings.append(f"Invalid LOG_LEVEL {log_level!r}, using {DEFAULT_LOG_LEVEL}.")
+        log_level = DEFAULT_LOG_LEVEL
+
+    try:
+        queue_size = int(os.getenv("LOG_QUEUE_SIZE") or DEFAULT_LOG_QUEUE_SIZE)
+    except ValueError:
+        warnings.append(
+            f"Invalid LOG_QUEUE_SIZE {os.getenv('LOG_QUEUE_SIZE')!r}, "
+            f"using {DEFAULT_LOG_QUEUE_SIZE}."
+        )
+        queue_size = DEFAULT_LOG_QUEUE_SIZE
+
+    _sample_rates = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES") or "")
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(log_level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    for message in warnings:
+        logger.warning(message)
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and stop the background writer."""
+    global _listener, _queue_handler
+
+    if _queue_handler is not None and _queue_handler.dropped:
+        logger.warning(
+            "Dropped %d log records in total because the log queue was full.",
+            _queue_handler.dropped,
+        )
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
+
+
+def init_app(app: Flask) -> None:
+    """Register request ID, sampling and timing hooks on a Flask app."""
+
+    @app.before_request
+    def _start_request_log() -> None:
+        g.log_start = time.perf_counter()
+        route_var.set(request.path)
+        request_id_var.set(request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex)
+        rate = _sample_rates.get(request.path, 1.0)
+        sampled_var.set(rate >= 1.0 or random.random() < rate)
+
+    @app.after_request
+    def _finish_request_log(response):
+        start = g.pop("log_start", None)
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        if start is not None:
+            level = logging.WARNING if response.status_code >= 500 else logging.INFO
+            logging.getLogger("request").log(
+                level,
+                "%s %s %s",
+                request.method,
+                request.path,
+                response.status_code,
+                extra={
+                    "method": request.method,
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+            )
+        return response
+
+    @app.teardown_request
+    def _clear_request_log(exc: Optional[BaseException] = None) -> None:
+        request_id_var.set(None)
+        route_var.set(None)
+        sampled_var.set(True)
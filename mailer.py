@@ -7,10 +7,10 @@ from email.mime.text import MIMEText
 from email.header import Header
 from email.utils import formataddr, formatdate, make_msgid
 
+from logging_setup import mask_email
+
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 # SMTP Configuration
 SMTP_SERVER: str = os.getenv("SMTP_SERVER", "")
@@ -35,7 +35,7 @@ def send_confirmation_email(
     recipient_email: str, lang: Literal["ar", "en"] = "en"
 ) -> None:
     """Send a confirmation email in Arabic or English."""
-    logging.info(f"Preparing confirmation email to {recipient_email}")
+    logger.info("Preparing confirmation email to %s", mask_email(recipient_email))
 
     if lang == "ar":
         subject = "الاشتراك"
@@ -67,7 +67,7 @@ def send_confirmation_email(
             server.login(SMTP_USERNAME, SMTP_PASSWORD)
 
             if requires_smtputf8:
-                logging.info("Detected non-ASCII characters. Using SMTPUTF8 extension.")
+                logger.info("Detected non-ASCII characters. Using SMTPUTF8 extension.")
                 server.sendmail(
                     FROM_EMAIL,
                     [recipient_email],
@@ -75,11 +75,17 @@ def send_confirmation_email(
                     mail_options=["SMTPUTF8"],
                 )
             else:
-                logging.info("No non-ASCII characters. Sending normally.")
+                logger.info("No non-ASCII characters. Sending normally.")
                 server.sendmail(FROM_EMAIL, [recipient_email], msg.as_string())
 
-        logging.info(f"Confirmation email successfully sent to {recipient_email}")
+        logger.info(
+            "Confirmation email successfully sent to %s", mask_email(recipient_email)
+        )
 
     except Exception as e:
-        logging.error(f"Failed to send confirmation email to {recipient_email}: {e}")
+        logger.error(
+            "Failed to send confirmation email to %s: %s",
+            mask_email(recipient_email),
+            e,
+        )
         raise
@@ -10,9 +10,7 @@ from typing import List, Optional, Dict, Any, Literal
 from anthropic import Anthropic
 
 # Setup
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 # Anthropic Claude setup
 claude = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
@@ -28,6 +26,10 @@ METADATA_FILE = "pdf_metadata.json"
 CHUNK_SIZE = 2000
 DELAY_BETWEEN_REQUESTS = 1  # seconds
 QUESTIONS_PER_DOCUMENT = 5
+REDUCE_GROUP_SIZE = 4  # summaries condensed together per reduction step
+
+# Summary tiers, from smallest to largest
+SUMMARY_TIERS = ("compact", "medium", "full")
 
 
 def ensure_directories() -> None:
@@ -63,10 +65,149 @@ def summarize_chunk(chunk: str) -> str:
         )
         return response.content[0].text.strip() if response.content else ""
     except Exception as e:
-        logging.error(f"Error summarizing chunk: {e}")
+        logger.error("Error summarizing chunk: %s", e)
         return ""
 
 
+def condense_summaries(summaries: List[str], detailed: bool = False) -> str:
+    try:
+        response = claude.messages.create(
+            model="claude-3-sonnet-20240229",
+            max_tokens=1500 if detailed else 700,
+            temperature=0.3,
+            system=(
+                "Combine the following partial summaries of one document into a "
+                f"single {'detailed' if detailed else 'concise'} summary in English. "
+                "Keep key facts, names and numbers."
+            ),
+            messages=[{"role": "user", "content": "\n\n".join(summaries)}],
+        )
+        return response.content[0].text.strip() if response.content else ""
+    except Exception as e:
+        logger.error("Error condensing summaries: %s", e)
+        return ""
+
+
+def reduce_summaries(summaries: List[str]) -> List[List[str]]:
+    """Condense summaries in groups, level by level, until one remains.
+
+    Returns every level, starting with the input summaries.
+    """
+    levels = [[summary for summary in summaries if summary]]
+
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        groups = [
+            current[i : i + REDUCE_GROUP_SIZE]
+            for i in range(0, len(current), REDUCE_GROUP_SIZE)
+        ]
+        condensed = [condense_summaries(group) for group in groups]
+        time.sleep(DELAY_BETWEEN_REQUESTS)
+
+        if not all(condensed):
+            logger.warning("Summary reduction stopped at %d parts.", len(current))
+            break
+
+        levels.append(condensed)
+
+    return levels
+
+
+def summary_tier_path(filename: str, tier: str) -> str:
+    if tier == "full":
+        return os.path.join(SUMMARY_FOLDER, f"{filename}.txt")
+    return os.path.join(SUMMARY_FOLDER, f"{filename}.{tier}.txt")
+
+
+def write_summary_tiers(
+    filename: str, chunk_summaries: List[str], include_full: bool = True
+) -> Optional[List[str]]:
+    """Write compact, medium and full summaries built from the chunk summaries.
+
+    Medium is the first reduction level, or a detailed condense pass when the
+    document reduces in a single step. A tier is only written if it is smaller
+    than the tier above it; otherwise any stale file for it is removed.
+    Returns the tiers written, or None if condensing failed and should be
+    retried.
+    """
+    levels = reduce_summaries(chunk_summaries)
+    full = "\n\n".join(levels[0])
+
+    if len(levels) > 2:
+        medium = "\n\n".join(levels[1])
+    elif len(levels) == 2:
+        medium = condense_summaries(levels[0], detailed=True)
+    else:
+        medium = ""
+
+    compact = "\n\n".join(levels[-1]) if len(levels) > 1 else ""
+
+    tiers: Dict[str, str] = {"full": full}
+    if medium and len(medium) < len(full):
+        tiers["medium"] = medium
+    if compact and len(compact) < len(tiers.get("medium", full)):
+        tiers["compact"] = compact
+
+    for tier in SUMMARY_TIERS:
+        tier_path = summary_tier_path(filename, tier)
+        if tier in tiers:
+            if tier == "full" and not include_full:
+                continue
+            with open(tier_path, "w", encoding="utf-8") as f:
+                f.write(tiers[tier])
+        elif os.path.exists(tier_path):
+            os.remove(tier_path)
+
+    written = [tier for tier in SUMMARY_TIERS if tier in tiers]
+
+    if len(levels[-1]) > 1 or (len(levels) == 2 and not medium):
+        logger.warning(
+            "Condensing failed for %s; saved tiers: %s.", filename, ", ".join(written)
+        )
+        return None
+
+    logger.info(
+        "Saved summary tiers for %s (%d reduction levels): %s.",
+        filename,
+        len(levels),
+        ", ".join(written),
+    )
+    return written
+
+
+def existing_summary_tiers(filename: str) -> List[str]:
+    return [
+        tier
+        for tier in SUMMARY_TIERS
+        if os.path.exists(summary_tier_path(filename, tier))
+    ]
+
+
+def ensure_summary_tiers(
+    filename: str, summary_text: str, recorded: Optional[List[str]] = None
+) -> Optional[List[str]]:
+    """Rebuild compact and medium tiers that are missing or too large.
+
+    `recorded` is the tier outcome saved in the metadata. Tiers left out of it
+    were dropped on purpose and are not rebuilt; without it all three tiers
+    are expected. Returns the tiers on disk, or None if rebuilding failed.
+    """
+    if len(summary_text) <= CHUNK_SIZE:
+        return existing_summary_tiers(filename)
+
+    expected = [t for t in SUMMARY_TIERS if recorded is None or t in recorded]
+    paths = [summary_tier_path(filename, tier) for tier in expected]
+    if all(os.path.exists(path) for path in paths):
+        sizes = [os.path.getsize(path) for path in paths]
+        if all(smaller < larger for smaller, larger in zip(sizes, sizes[1:])):
+            return expected
+
+    logger.info("Rebuilding summary tiers for %s...", filename)
+    return write_summary_tiers(
+        filename, split_text_into_chunks(summary_text), include_full=False
+    )
+
+
 def generate_mcq_questions(
     summary_text: str, n: int, language: Literal["ar", "en"]
 ) -> List[Dict[str, Any]]:
@@ -99,6 +240,11 @@ def generate_mcq_questions(
             messages=[],
         )
 
+        if response.stop_reason == "max_tokens":
+            logger.warning(
+                "MCQ reply for %d %s questions was cut off at max_tokens.", n, language
+            )
+
         raw_output = response.content[0].text.strip() if response.content else ""
         raw_output = re.sub(r"^```(?:json)?\\s*", "", raw_output)
         raw_output = re.sub(r"\\s*```$", "", raw_output)
@@ -106,7 +252,7 @@ def generate_mcq_questions(
         return json.loads(raw_output)
 
     except Exception as e:
-        logging.error(f"Error generating MCQ questions: {e}")
+        logger.error("Error generating MCQ questions: %s", e)
         return []
 
 
@@ -119,28 +265,27 @@ def summarize_pdf(pdf_path: str) -> Optional[str]:
     saved_hash = load_saved_hash(hash_path)
 
     if os.path.exists(summary_path) and saved_hash == current_hash:
-        logging.info(f"No changes detected in {filename}. Skipping summarization.")
+        logger.info("No changes detected in %s. Skipping summarization.", filename)
         return summary_path
 
-    logging.info(f"Summarizing {filename}...")
+    logger.info("Summarizing %s...", filename)
     try:
         full_text = extract_text_from_pdf(pdf_path)
         chunks = split_text_into_chunks(full_text)
-        logging.info(f"Total {len(chunks)} chunks created for {filename}.")
+        logger.info("Total %s chunks created for %s.", len(chunks), filename)
 
         all_summaries = [summarize_chunk(chunk) for chunk in chunks if chunk]
         time.sleep(DELAY_BETWEEN_REQUESTS)
 
-        final_summary = "\n\n".join(all_summaries)
-
-        with open(summary_path, "w", encoding="utf-8") as f:
-            f.write(final_summary)
+        if write_summary_tiers(filename, all_summaries) is None:
+            logger.warning("Summary tiers for %s will be retried.", filename)
+            return None
 
         save_hash(current_hash, hash_path)
         return summary_path
 
     except Exception as e:
-        logging.error(f"Failed to summarize {filename}: {e}")
+        logger.error("Failed to summarize %s: %s", filename, e)
         return None
 
 
@@ -175,7 +320,7 @@ def generate_summary_and_questions() -> None:
     pdf_files = [f for f in os.listdir(PDF_FOLDER) if f.endswith(".pdf")]
 
     if not pdf_files:
-        logging.error(f"No PDF files found in {PDF_FOLDER}. Nothing to process.")
+        logger.error("No PDF files found in %s. Nothing to process.", PDF_FOLDER)
         return
 
     all_questions_en, all_questions_ar = [], []
@@ -186,13 +331,21 @@ def generate_summary_and_questions() -> None:
 
         metadata_entry = pdf_metadata.get(pdf_file)
 
+        document = os.path.splitext(pdf_file)[0]
+        summarized_now = False
+
         if metadata_entry and metadata_entry.get("hash") == current_hash:
-            logging.info(f"No changes detected in {pdf_file}. Skipping summarization.")
+            logger.info("No changes detected in %s. Skipping summarization.", pdf_file)
         else:
-            summarize_pdf(pdf_path)
+            summarized = summarize_pdf(pdf_path) is not None
+            summarized_now = True
             pdf_metadata[pdf_file] = {
-                "hash": current_hash,
-                "summary_ready": True,
+                # Leave the hash unset on failure so the next run retries
+                "hash": current_hash if summarized else None,
+                "summary_ready": os.path.exists(summary_tier_path(document, "full")),
+                "summary_tiers": (
+                    existing_summary_tiers(document) if summarized else None
+                ),
                 "questions_en_ready": False,
                 "questions_ar_ready": False,
             }
@@ -202,8 +355,8 @@ def generate_summary_and_questions() -> None:
         )
 
         if not os.path.exists(summary_path):
-            logging.error(
-                f"Summary file missing for {pdf_file}. Skipping questions generation."
+            logger.error(
+                "Summary file missing for %s. Skipping questions generation.", pdf_file
             )
             continue
 
@@ -211,8 +364,13 @@ def generate_summary_and_questions() -> None:
             with open(summary_path, "r", encoding="utf-8") as f:
                 summary_text = f.read()
 
+            if not summarized_now:
+                pdf_metadata[pdf_file]["summary_tiers"] = ensure_summary_tiers(
+                    document, summary_text, pdf_metadata[pdf_file].get("summary_tiers")
+                )
+
             if not pdf_metadata[pdf_file].get("questions_en_ready"):
-                logging.info(f"Generating EN questions for {pdf_file}...")
+                logger.info("Generating EN questions for %s...", pdf_file)
                 questions_en = generate_mcq_questions(
                     summary_text, QUESTIONS_PER_DOCUMENT, "en"
                 )
@@ -221,7 +379,7 @@ def generate_summary_and_questions() -> None:
                     pdf_metadata[pdf_file]["questions_en_ready"] = True
 
             if not pdf_metadata[pdf_file].get("questions_ar_ready"):
-                logging.info(f"Generating AR questions for {pdf_file}...")
+                logger.info("Generating AR questions for %s...", pdf_file)
                 questions_ar = generate_mcq_questions(
                     summary_text, QUESTIONS_PER_DOCUMENT, "ar"
                 )
@@ -230,23 +388,27 @@ def generate_summary_and_questions() -> None:
                     pdf_metadata[pdf_file]["questions_ar_ready"] = True
 
         except Exception as e:
-            logging.error(f"Failed to generate questions for {pdf_file}: {e}")
+            logger.error("Failed to generate questions for %s: %s", pdf_file, e)
 
     if all_questions_en:
         with open(QUESTION_BANK_EN_FILE, "w", encoding="utf-8") as f:
             json.dump(all_questions_en, f, ensure_ascii=False, indent=2)
-        logging.info(
-            f"English question bank saved to {QUESTION_BANK_EN_FILE}. Total questions: {len(all_questions_en)}"
+        logger.info(
+            "English question bank saved to %s. Total questions: %d",
+            QUESTION_BANK_EN_FILE,
+            len(all_questions_en),
         )
 
     if all_questions_ar:
         with open(QUESTION_BANK_AR_FILE, "w", encoding="utf-8") as f:
             json.dump(all_questions_ar, f, ensure_ascii=False, indent=2)
-        logging.info(
-            f"Arabic question bank saved to {QUESTION_BANK_AR_FILE}. Total questions: {len(all_questions_ar)}"
+        logger.info(
+            "Arabic question bank saved to %s. Total questions: %d",
+            QUESTION_BANK_AR_FILE,
+            len(all_questions_ar),
         )
 
     if not all_questions_en and not all_questions_ar:
-        logging.warning("No questions generated.")
+        logger.warning("No questions generated.")
 
     save_pdf_metadata(pdf_metadata)
@@ -5,10 +5,10 @@ import idna
 from typing import Set
 from email_validator import validate_email, EmailNotValidError
 
+from logging_setup import mask_email
+
 # Logging setup
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 # Regular expressions for script detection
 ARABIC_RE = re.compile(
@@ -26,10 +26,10 @@ def validate_email_general(email: str) -> bool:
         validate_email(email, allow_smtputf8=True, check_deliverability=False)
         local_part, domain = email.split("@")
         idna.encode(domain)
-        logging.info(f"Validated email: {email}")
+        logger.debug("Validated email: %s", mask_email(email))
         return True
     except (EmailNotValidError, ValueError, UnicodeError) as e:
-        logging.warning(f"Invalid email detected: {email} | Error: {e}")
+        logger.warning("Invalid email detected: %s | Error: %s", mask_email(email), e)
         return False
 
 